@@ -0,0 +1,15 @@
+import os, yaml
+
+# Config compartida por run.py y run_multi.py (sin efectos secundarios: no crea el Bot)
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "../config/settings.yaml")
+if not os.path.exists(CONFIG_PATH):
+    # checkout plano: config/ junto a los módulos
+    CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config/settings.yaml")
+with open(CONFIG_PATH, "r") as f:
+    settings = yaml.safe_load(f)
+
+SCAN_INTERVAL = int(settings.get("updates", {}).get("scan_interval_sec", 180))
+MIN_CHANGE = float(settings.get("updates", {}).get("min_change_pct", 2.0))
+COOLDOWN_MIN = int(settings.get("updates", {}).get("realert_cooldown_min", 15))
+TOP_N = int(settings.get("updates", {}).get("top_n", 5))
+LOG_CSV = settings.get("logging", {}).get("log_csv", "data/logs/signals.csv")
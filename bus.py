@@ -0,0 +1,128 @@
+import os, sys, time, queue, signal, threading, zlib
+from datetime import datetime
+from multiprocessing.managers import BaseManager
+from positions_store import PositionTable, POS_CSV_DEFAULT
+
+# Bus local (Unix socket) para el modo multi-proceso:
+#   scanner -> "positions-<i>" (un shard por position manager)
+#   scanner / position managers -> "alerts" -> dispatcher de Telegram
+#   posiciones compartidas -> PositionTable alojada en el proceso del bus
+# Las posiciones se escriben al CSV en cada cambio (sobreviven a un reinicio del bus);
+# las colas viven solo en memoria: si el bus cae se pierden los ciclos y alertas pendientes.
+# Los clientes no reconectan: si pierden el bus terminan y el supervisor los relanza.
+
+# El manager intercambia pickles: el authkey nunca va en el repo. El supervisor genera
+# uno por ejecución y lo hereda a sus hijos; para lanzar roles sueltos hay que exportarlo.
+AUTHKEY_ENV = "STOCK_EXPLODER_BUS_KEY"
+
+ALERTS_QUEUE = "alerts"
+
+def shard_queue(shard):
+    return f"positions-{shard}"
+
+def shard_of(symbol, n_shards):
+    """Shard estable por símbolo (crc32: hash() cambia entre procesos)."""
+    return zlib.crc32(str(symbol).encode()) % max(1, int(n_shards))
+
+def merge_cycles(cycles, max_age_sec, now=None):
+    """
+    Junta los ciclos acumulados en la cola de un shard (p.ej. mientras su position
+    manager estaba caído): conserva todas las señales "new" (la primera por símbolo)
+    y solo las cotizaciones del ciclo más reciente, o ninguna si ya son viejas.
+    """
+    now = now or datetime.now()
+    latest = cycles[-1]
+    new, seen = [], set()
+    for c in cycles:
+        for q in c["new"]:
+            if q["Symbol"] not in seen:
+                seen.add(q["Symbol"])
+                new.append(q)
+    age = (now - datetime.fromisoformat(latest["ts"])).total_seconds()
+    return {"ts": latest["ts"], "quotes": latest["quotes"] if age <= max_age_sec else [], "new": new}
+
+def bus_settings(settings):
+    mp = settings.get("multiproc", {})
+    return {
+        "address": mp.get("bus_socket", "data/bus.sock"),
+        "authkey": os.environ.get(AUTHKEY_ENV),
+        "shards": max(1, int(mp.get("position_shards", 2))),
+        "positions_csv": mp.get("positions_csv", POS_CSV_DEFAULT),
+        "restart_backoff_sec": float(mp.get("restart_backoff_sec", 5)),
+    }
+
+
+# === Lado servidor (proceso del bus) ===
+_queues = {}
+_queues_lock = threading.Lock()
+_table = None
+
+def _get_queue(name):
+    with _queues_lock:
+        if name not in _queues:
+            _queues[name] = queue.Queue()
+        return _queues[name]
+
+def _get_positions():
+    return _table
+
+class _BusServer(BaseManager):
+    pass
+
+_BusServer.register("get_queue", callable=_get_queue)
+_BusServer.register("get_positions", callable=_get_positions)
+
+def serve(address, authkey, csv_path=POS_CSV_DEFAULT):
+    """Levanta el bus y bloquea. Carga las posiciones del CSV y las persiste en cada cambio."""
+    global _table
+    _table = PositionTable.from_csv(csv_path)
+
+    if os.path.dirname(address):
+        os.makedirs(os.path.dirname(address), exist_ok=True)
+    if os.path.exists(address):
+        os.remove(address)  # socket huérfano de una ejecución anterior
+
+    # SIGTERM (supervisor) -> SystemExit para que el listener cierre y borre el socket
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    # socket solo accesible por el usuario (umask activo durante el bind)
+    old_umask = os.umask(0o177)
+    try:
+        server = _BusServer(address=address, authkey=authkey.encode()).get_server()
+    finally:
+        os.umask(old_umask)
+    print(f"🚌 Bus escuchando en {address}")
+    server.serve_forever()
+
+
+# === Lado cliente (scanner, position managers, alertas) ===
+class BusClient(BaseManager):
+    pass
+
+BusClient.register("get_queue")
+BusClient.register("get_positions")
+
+def connect(address, authkey, retries=30, wait_sec=1.0):
+    """Conecta al bus; reintenta mientras el proceso del bus arranca."""
+    last_err = None
+    for _ in range(retries):
+        try:
+            client = BusClient(address=address, authkey=authkey.encode())
+            client.connect()
+            return client
+        except OSError as e:
+            last_err = e
+            time.sleep(wait_sec)
+    raise ConnectionError(f"No se pudo conectar al bus en {address}: {last_err}")
+
+# Errores de un proxy cuando el bus cayó: el rol debe terminar (el supervisor lo relanza)
+BUS_ERRORS = (EOFError, OSError)
+
+
+class BusAlert:
+    """Publica textos en la cola de alertas; los envía a Telegram el dispatcher."""
+    def __init__(self, client):
+        self.queue = client.get_queue(ALERTS_QUEUE)
+
+    def send_message(self, text):
+        self.queue.put(text)
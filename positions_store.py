@@ -1,28 +1,50 @@
-import os, pandas as pd, json
+import os, pandas as pd, json, threading
 from datetime import datetime
 
 POS_CSV_DEFAULT = "data/logs/positions.csv"
 
+POS_COLUMNS = [
+    "symbol","status","created_ts","updated_ts",
+    "entry_price","avg_price","qty_usd","adds_done",
+    "stop","tp1","tp2","partial_taken","notes"
+]
+
+# Si hay backend (proxy a PositionTable en el bus), el estado vive allí y no en el CSV.
+_backend = None
+
+def use_backend(table):
+    """Redirige todas las funciones de este módulo a una PositionTable (o su proxy)."""
+    global _backend
+    _backend = table
+
 def _ensure_parent(path):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
 
-def load_positions(csv_path=POS_CSV_DEFAULT):
+def _read_csv(csv_path):
     if not os.path.exists(csv_path):
-        return pd.DataFrame(columns=[
-            "symbol","status","created_ts","updated_ts",
-            "entry_price","avg_price","qty_usd","adds_done",
-            "stop","tp1","tp2","partial_taken","notes"
-        ])
+        return pd.DataFrame(columns=POS_COLUMNS)
     df = pd.read_csv(csv_path)
     if "partial_taken" in df.columns:
         df["partial_taken"] = df["partial_taken"].fillna(False).astype(bool)
     return df
 
+def load_positions(csv_path=POS_CSV_DEFAULT):
+    if _backend is not None:
+        rows = _backend.rows()
+        return pd.DataFrame(rows) if rows else pd.DataFrame(columns=POS_COLUMNS)
+    return _read_csv(csv_path)
+
 def save_positions(df, csv_path=POS_CSV_DEFAULT):
     _ensure_parent(csv_path)
-    df.to_csv(csv_path, index=False)
+    # escribir a un temporal y reemplazar: un corte a mitad no deja el CSV truncado
+    tmp_path = f"{csv_path}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
 
 def upsert_position(pos, csv_path=POS_CSV_DEFAULT):
+    if _backend is not None:
+        return _backend.upsert(pos)
     df = load_positions(csv_path)
     now = datetime.now().isoformat(timespec="seconds")
     pos["updated_ts"] = now
@@ -34,11 +56,15 @@ def upsert_position(pos, csv_path=POS_CSV_DEFAULT):
     save_positions(df, csv_path)
 
 def get_position(symbol, csv_path=POS_CSV_DEFAULT):
+    if _backend is not None:
+        return _backend.get(symbol)
     df = load_positions(csv_path)
     m = df[df["symbol"] == symbol]
     return None if m.empty else m.iloc[0].to_dict()
 
 def close_position(symbol, reason, csv_path=POS_CSV_DEFAULT):
+    if _backend is not None:
+        return _backend.close(symbol, reason)
     df = load_positions(csv_path)
     if (df["symbol"] == symbol).any():
         df.loc[df["symbol"] == symbol, "status"] = f"CLOSED:{reason}"
@@ -51,6 +77,8 @@ def update_position(symbol, updates, csv_path=POS_CSV_DEFAULT):
     Ejemplo:
         update_position("HTZ", {"avg_price": 7.45, "stop": 6.88})
     """
+    if _backend is not None:
+        return _backend.update(symbol, updates)
     df = load_positions(csv_path)
     if not (df["symbol"] == symbol).any():
         return
@@ -59,4 +87,71 @@ def update_position(symbol, updates, csv_path=POS_CSV_DEFAULT):
             continue
         df.loc[df["symbol"] == symbol, k] = v
     df.loc[df["symbol"] == symbol, "updated_ts"] = datetime.now().isoformat(timespec="seconds")
-    save_positions(df, csv_path)
\ No newline at end of file
+    save_positions(df, csv_path)
+
+
+class PositionTable:
+    """
+    Tabla de posiciones en memoria (símbolo -> fila). La aloja el proceso del bus
+    y los position managers la usan vía proxy. Con csv_path, cada cambio se
+    escribe al CSV (write-through) para que un reinicio del bus no pierda cierres ni ADDs.
+    """
+    def __init__(self, rows=None, csv_path=None):
+        self._rows = {r["symbol"]: dict(r) for r in (rows or [])}
+        self._lock = threading.RLock()
+        self.csv_path = csv_path
+
+    @classmethod
+    def from_csv(cls, csv_path=POS_CSV_DEFAULT):
+        try:
+            df = _read_csv(csv_path)
+            if "symbol" not in df.columns:
+                raise ValueError("falta la columna 'symbol'")
+        except Exception as e:
+            # CSV dañado: se aparta (no se borra) y se arranca vacío en vez de caer en bucle
+            backup = f"{csv_path}.corrupt-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            os.replace(csv_path, backup)
+            print(f"⚠️ positions CSV ilegible ({e}); movido a {backup}, se arranca sin posiciones")
+            return cls(csv_path=csv_path)
+        return cls(df.to_dict("records"), csv_path=csv_path)
+
+    def save(self, csv_path=None):
+        csv_path = csv_path or self.csv_path
+        with self._lock:
+            df = pd.DataFrame(self.rows())
+            save_positions(df if not df.empty else pd.DataFrame(columns=POS_COLUMNS), csv_path)
+
+    def _persist(self):
+        if self.csv_path:
+            self.save()
+
+    def rows(self):
+        with self._lock:
+            return [dict(r) for r in self._rows.values()]
+
+    def get(self, symbol):
+        with self._lock:
+            r = self._rows.get(symbol)
+            return None if r is None else dict(r)
+
+    def upsert(self, pos):
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            row = self._rows.setdefault(pos["symbol"], {"created_ts": now})
+            row.update(pos)
+            row["updated_ts"] = now
+            self._persist()
+
+    def close(self, symbol, reason):
+        self.update(symbol, {"status": f"CLOSED:{reason}"})
+
+    def update(self, symbol, updates):
+        with self._lock:
+            row = self._rows.get(symbol)
+            if row is None:
+                return
+            for k, v in updates.items():
+                if k in POS_COLUMNS:
+                    row[k] = v
+            row["updated_ts"] = datetime.now().isoformat(timespec="seconds")
+            self._persist()
@@ -0,0 +1,264 @@
+import argparse, asyncio, os, queue, secrets, signal, sys, time
+from datetime import datetime
+from multiprocessing import Process
+
+import bus
+import positions_store
+from app_settings import settings, SCAN_INTERVAL, LOG_CSV
+from scanner import now_str, today_str, scan_market_top_pennies, process_candidate
+from alert_manager import AlertManager
+from store import load_today_last_alerts, summarize_today
+from trade_evaluator import register_new_signal
+from positions_store import load_positions
+
+# Modo multi-proceso (opcional). Uso:
+#   python run_multi.py                       # supervisor: bus + scanner + N shards + alertas
+#   python run_multi.py bus|scanner|alerts    # un solo rol (el bus debe estar arriba)
+#   python run_multi.py positions --shard 1   # un position manager concreto
+
+BUS = bus.bus_settings(settings)
+
+
+def _authkey():
+    if not BUS["authkey"]:
+        raise SystemExit(f"Falta {bus.AUTHKEY_ENV}: exportalo para lanzar roles sueltos (el supervisor lo genera solo)")
+    return BUS["authkey"]
+
+def _connect():
+    return bus.connect(BUS["address"], _authkey())
+
+def _check_shard(shard):
+    if not 0 <= shard < BUS["shards"]:
+        raise ValueError(f"shard {shard} fuera de rango (position_shards={BUS['shards']})")
+
+def _open_symbols():
+    pos_df = load_positions()
+    if pos_df.empty:
+        return []
+    return pos_df[pos_df["status"].astype(str).str.startswith("OPEN")]["symbol"].tolist()
+
+
+# === 1️⃣ SCANNER (productor) ===
+async def scanner_loop(client, announce=True):
+    alerts = bus.BusAlert(client)
+    shards = [client.get_queue(bus.shard_queue(i)) for i in range(BUS["shards"])]
+    positions_store.use_backend(client.get_positions())
+
+    if announce:
+        alerts.send_message(f"🟢 Stock Exploder Realtime (multi-proceso, {BUS['shards']} shards) — escaneo cada {SCAN_INTERVAL//60} min ⚡")
+    last_alert = load_today_last_alerts(LOG_CSV, today_str())
+
+    try:
+        while True:
+            df = await scan_market_top_pennies()
+            ts = datetime.now().isoformat(timespec="seconds")
+            dstr = today_str()
+
+            if df is None or df.empty:
+                print(f"[{now_str()}] ⚠️ Sin candidatos en este ciclo.")
+                await asyncio.sleep(SCAN_INTERVAL)
+                continue
+
+            try:
+                open_symbols = _open_symbols()
+            except bus.BUS_ERRORS:
+                raise
+            except Exception as e:
+                print(f"⚠️ No se pudieron cargar posiciones abiertas: {e}")
+                open_symbols = []
+
+            cycles = [{"ts": ts, "quotes": [], "new": []} for _ in shards]
+            msgs = []
+
+            for _, r in df.iterrows():
+                quote = {"Symbol": r["Symbol"], "price": float(r["price"]), "pct": float(r["pct"]), "volume": int(r["volume"])}
+                cycle = cycles[bus.shard_of(quote["Symbol"], len(shards))]
+                cycle["quotes"].append(quote)
+
+                msg, reason = process_candidate(r, ts, dstr, open_symbols, last_alert)
+                if msg is None:
+                    continue
+                msgs.append(msg)
+                if reason == "new":
+                    cycle["new"].append(quote)  # el position manager del shard la registra
+
+            if msgs:
+                final = f"🚀 [{now_str()}] Oportunidades long (low-price):\n" + "\n\n".join(msgs)
+                print(final)
+                alerts.send_message(final)
+            else:
+                print(f"[{now_str()}] ℹ️ Sin cambios significativos vs. últimas alertas.")
+
+            # cada shard recibe su ciclo (aunque no tenga cotizaciones) para evaluar sus posiciones
+            for q, cycle in zip(shards, cycles):
+                q.put(cycle)
+
+            await asyncio.sleep(SCAN_INTERVAL)
+
+    except (SystemExit, KeyboardInterrupt, asyncio.CancelledError):
+        # EOD summary (solo en parada pedida; un crash se propaga sin avisar al usuario)
+        summary = summarize_today(LOG_CSV, today_str())
+        if summary is not None and not summary.empty:
+            lines = [f"{r['symbol']}: max {r['max_pct']:.1f}% | alerts {int(r['alerts'])}" for _, r in summary.iterrows()]
+            alerts.send_message("📊 EOD — Resumen del día (máximo % change observado):\n" + "\n".join(lines))
+        else:
+            alerts.send_message("📊 EOD — Sin datos para resumir hoy.")
+        alerts.send_message("⏹️ Bot detenido por el usuario.")
+
+
+# === 2️⃣ POSITION MANAGER (consumidor, uno por shard) ===
+def _drain(inbox):
+    """Bloquea hasta el próximo ciclo y se lleva también los que se hayan acumulado."""
+    cycles = [inbox.get()]
+    while True:
+        try:
+            cycles.append(inbox.get_nowait())
+        except queue.Empty:
+            return cycles
+
+def positions_loop(client, shard):
+    n_shards = BUS["shards"]
+    inbox = client.get_queue(bus.shard_queue(shard))
+    positions_store.use_backend(client.get_positions())
+    print(f"🧮 Position manager shard {shard}/{n_shards} escuchando")
+
+    while True:
+        cycles = _drain(inbox)
+        if len(cycles) > 1:
+            print(f"ℹ️ Shard {shard}: {len(cycles)} ciclos acumulados, se procesan juntos")
+        cycle = bus.merge_cycles(cycles, SCAN_INTERVAL)
+
+        for q in cycle["new"]:
+            try:
+                register_new_signal(q["Symbol"], q["price"], settings)
+            except bus.BUS_ERRORS:
+                raise
+            except Exception as e:
+                print(f"⚠️ Error registrando {q['Symbol']}: {e}")
+
+        # Igual que run.py: no se evalúan posiciones abiertas (evaluate_symbol / manage_trade)
+        # hasta que ambos modos tengan dedupe de alertas; partir en procesos no cambia qué se opera.
+
+
+# === 3️⃣ DISPATCHER DE ALERTAS (consumidor) ===
+async def alerts_loop(client):
+    # un solo event loop: el cliente HTTP del Bot queda ligado al primero que lo usa
+    alert = AlertManager(settings["telegram_token"], settings["telegram_chat_id"])
+    inbox = client.get_queue(bus.ALERTS_QUEUE)
+    loop = asyncio.get_running_loop()
+    while True:
+        text = await loop.run_in_executor(None, inbox.get)
+        if text is None:  # centinela del supervisor: cola drenada
+            return
+        await alert.send_async_message(text)
+
+
+# === Entradas por rol ===
+def run_bus():
+    bus.serve(BUS["address"], _authkey(), BUS["positions_csv"])
+
+def run_scanner(announce=True):
+    # SIGTERM -> SystemExit para que se publique el resumen EOD
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    asyncio.run(scanner_loop(_connect(), announce))
+
+def run_positions(shard):
+    _check_shard(shard)
+    positions_loop(_connect(), shard)
+
+def run_alerts():
+    asyncio.run(alerts_loop(_connect()))
+
+
+# === SUPERVISOR ===
+def _child(target, *args):
+    # Ctrl+C / SIGTERM los gestiona el supervisor, que apaga en orden
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    target(*args)
+
+def supervise():
+    # authkey nuevo por ejecución; los hijos (fork) lo heredan vía entorno y BUS
+    if not BUS["authkey"]:
+        BUS["authkey"] = os.environ[bus.AUTHKEY_ENV] = secrets.token_hex(32)
+
+    roles = {"bus": (run_bus, ())}
+    roles["alerts"] = (run_alerts, ())
+    for i in range(BUS["shards"]):
+        roles[f"positions-{i}"] = (run_positions, (i,))
+    roles["scanner"] = (run_scanner, (True,))
+
+    procs, restart_at = {}, {}
+
+    def start(name, restarted=False):
+        target, args = roles[name]
+        if name == "scanner" and restarted:
+            args = (False,)  # sin banner de inicio tras un crash o caída del bus
+        p = Process(target=_child, args=(target, *args), name=name)
+        p.start()
+        procs[name] = p
+
+    # SIGTERM (systemd, kill) sigue el mismo apagado ordenado que Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    for name in roles:
+        start(name)
+
+    try:
+        while True:
+            time.sleep(1)
+            for name, p in list(procs.items()):
+                if p.is_alive():
+                    continue
+                if name not in restart_at:
+                    print(f"⚠️ {name} terminó (código {p.exitcode}); reinicio en {BUS['restart_backoff_sec']:.0f}s")
+                    restart_at[name] = time.time() + BUS["restart_backoff_sec"]
+                elif time.time() >= restart_at[name]:
+                    del restart_at[name]
+                    start(name, restarted=True)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    # Apagado ordenado: productor -> consumidores -> alertas (drenando) -> bus
+    def stop(name, timeout=10):
+        p = procs[name]
+        if p.is_alive():
+            p.terminate()
+        p.join(timeout)
+
+    stop("scanner", timeout=15)
+    for i in range(BUS["shards"]):
+        stop(f"positions-{i}")
+    try:
+        _connect().get_queue(bus.ALERTS_QUEUE).put(None)
+        procs["alerts"].join(30)
+    except Exception as e:
+        print(f"⚠️ No se pudo drenar la cola de alertas: {e}")
+    stop("alerts")
+    stop("bus")
+    print("⏹️ Bot detenido por el usuario.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stock Exploder — modo multi-proceso")
+    parser.add_argument("role", nargs="?", default="all", choices=["all", "bus", "scanner", "positions", "alerts"])
+    parser.add_argument("--shard", type=int, default=0, help="shard del position manager (0..position_shards-1)")
+    args = parser.parse_args()
+
+    if args.role == "all":
+        supervise()
+    elif args.role == "bus":
+        run_bus()
+    elif args.role == "scanner":
+        run_scanner()
+    elif args.role == "positions":
+        try:
+            _check_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        run_positions(args.shard)
+    else:
+        run_alerts()
@@ -0,0 +1,133 @@
+import pandas as pd, requests
+from datetime import datetime
+from app_settings import settings, MIN_CHANGE, COOLDOWN_MIN, TOP_N, LOG_CSV
+from store import append_signal_row
+
+def now_str():
+    return datetime.now().strftime("%H:%M:%S")
+
+def today_str():
+    return datetime.now().strftime("%Y-%m-%d")
+
+async def scan_market_top_pennies():
+    """Escáner robusto que usa los campos disponibles según el horario."""
+    try:
+        urls = [
+            "https://query1.finance.yahoo.com/v1/finance/screener/predefined/saved?count=100&scrIds=day_gainers",
+            "https://query1.finance.yahoo.com/v1/finance/screener/predefined/saved?count=100&scrIds=most_actives"
+        ]
+
+        frames = []
+        for url in urls:
+            resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+            if resp.status_code != 200:
+                print(f"⚠️ Yahoo devolvió código {resp.status_code} para {url}")
+                continue
+
+            try:
+                data = resp.json()
+                quotes = data.get("finance", {}).get("result", [{}])[0].get("quotes", [])
+                if not quotes:
+                    continue
+                df = pd.DataFrame(quotes)
+                frames.append(df)
+            except Exception as e:
+                print(f"⚠️ Error decodificando JSON de Yahoo: {e}")
+                continue
+
+        if not frames:
+            print("⚠️ Yahoo devolvió vacío para ambos endpoints.")
+            return pd.DataFrame()
+
+        df = pd.concat(frames, ignore_index=True).drop_duplicates(subset=["symbol"])
+
+        # Buscar qué columnas existen según horario (market o postMarket) preMarketChangePercent
+        possible_pct_cols = [
+            "preMarketChangePercent", "postMarketChangePercent", "regularMarketChangePercent"
+        ]
+        possible_price_cols = [
+            "regularMarketPrice", "postMarketPrice", "preMarketPrice"
+        ]
+        pct_col = next((c for c in possible_pct_cols if c in df.columns), None)
+        price_col = next((c for c in possible_price_cols if c in df.columns), None)
+
+        if not pct_col or not price_col:
+            print("⚠️ Yahoo no tiene columnas válidas de precio/cambio.")
+            return pd.DataFrame()
+
+        # Definir columnas uniformes
+        df["Symbol"] = df["symbol"]
+        df["price"] = pd.to_numeric(df[price_col], errors="coerce")
+        df["pct"] = pd.to_numeric(df[pct_col], errors="coerce")
+        df["volume"] = pd.to_numeric(df.get("regularMarketVolume", df.get("postMarketVolume", df.get("preMarketVolume", 0))), errors="coerce")
+
+        # Filtrar penny stocks de momentum
+        print(df[["Symbol", "price", "pct", "volume"]].head(10))
+        df = df[(df["price"] < 20.0) & (df["pct"] > 5.0) & (df["volume"] > 1_000_000)]
+        if df.empty:
+            print("⚠️ Ningún ticker cumplió los filtros actuales.")
+            return pd.DataFrame()
+
+        # ExplodeScore
+        df["ExplodeScore"] = df["pct"] * 0.6 + (df["volume"] / df["volume"].max()) * 40.0
+        df = df.sort_values("ExplodeScore", ascending=False).head(TOP_N).reset_index(drop=True)
+
+        return df
+
+    except Exception as e:
+        print(f"❌ Error escaneando mercado: {e}")
+        return pd.DataFrame()
+
+def process_candidate(r, ts, dstr, open_symbols, last_alert):
+    """
+    Loguea el candidato y aplica la política de re-alerta (cooldown o salto de %).
+    Devuelve (mensaje, reason); mensaje es None si no hay que alertar.
+    Actualiza last_alert cuando se alerta.
+    """
+    sym = r["Symbol"]
+    price = float(r["price"])
+    pct = float(r["pct"])
+    vol = int(r["volume"])
+
+    # log histórico SIEMPRE
+    append_signal_row(LOG_CSV, {
+        "date": dstr, "ts": ts, "symbol": sym,
+        "price": price, "pct_change": pct, "volume": vol
+    })
+
+    # Evitar alertas duplicadas si ya hay una posición abierta
+    if sym in open_symbols:
+        return None, "open"
+
+    la = last_alert.get(sym)
+    should_alert = False
+    reason = "new"
+
+    if la is None:
+        should_alert = True
+    else:
+        delta_pct = pct - float(la.get("last_pct", 0.0))
+        last_time = datetime.fromisoformat(la["last_ts"])
+        minutes_passed = (datetime.now() - last_time).total_seconds() / 60.0
+        if delta_pct >= MIN_CHANGE or minutes_passed >= COOLDOWN_MIN:
+            should_alert = True
+            reason = f"+{delta_pct:.1f}% / {minutes_passed:.0f}m"
+
+    if not should_alert:
+        return None, reason
+
+    # cálculo de sugerencia de acciones (fijo $100)
+    investment = float(settings.get("capital", {}).get("per_stock_usd", 100))
+    shares = max(1, int(investment // price))
+    total_cost = round(shares * price, 2)
+
+    # mensaje legible (1 sola entrada por símbolo)
+    msg = (
+        f"💎 {sym}\n"
+        f"📈 Cambio: +{pct:.2f}%\n"
+        f"💰 Precio: ${price:.2f}\n"
+        f"📊 Volumen: {vol:,}\n"
+        f"🎯 Acciones sugeridas: {shares} (~${total_cost})"
+    )
+    last_alert[sym] = {"last_pct": pct, "last_price": price, "last_ts": ts}
+    return msg, reason
@@ -0,0 +1,125 @@
+import multiprocessing, os, stat, zlib
+from datetime import datetime, timedelta
+
+import pytest
+
+import bus
+
+KEY = "test-key"
+ctx = multiprocessing.get_context("fork")  # como el supervisor
+
+
+def _start_bus(address, csv_path):
+    p = ctx.Process(target=bus.serve, args=(address, KEY, csv_path), daemon=True)
+    p.start()
+    return p
+
+
+def _stop_bus(p):
+    p.terminate()
+    p.join(10)
+
+
+def _client_job(address, job, out):
+    try:
+        out.put(job(bus.connect(address, KEY, retries=20, wait_sec=0.1)))
+    except Exception as e:
+        out.put(repr(e))
+
+
+def _in_fresh_process(address, job):
+    """Corre job(client) en un proceso nuevo: estado de proxies limpio, como un rol relanzado."""
+    out = ctx.Queue()
+    p = ctx.Process(target=_client_job, args=(address, job, out))
+    p.start()
+    res = out.get(timeout=20)
+    p.join(10)
+    return res
+
+
+def _publish_and_trade(client):
+    alerts = client.get_queue(bus.ALERTS_QUEUE)
+    bus.BusAlert(client).send_message("hola")
+    table = client.get_positions()
+    table.upsert({"symbol": "AAA", "status": "OPEN", "entry_price": 5.0})
+    table.close("AAA", "TP2")
+    return alerts.get(timeout=5), table.get("AAA")["status"]
+
+
+def _read_status(client):
+    return client.get_positions().get("AAA")["status"]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "b.sock"), str(tmp_path / "positions.csv")
+
+
+def test_round_trip_survives_bus_restart(paths):
+    address, csv_path = paths
+    p = _start_bus(address, csv_path)
+    try:
+        assert _in_fresh_process(address, _publish_and_trade) == ("hola", "CLOSED:TP2")
+    finally:
+        _stop_bus(p)
+    assert not os.path.exists(address)
+
+    p = _start_bus(address, csv_path)
+    try:
+        assert _in_fresh_process(address, _read_status) == "CLOSED:TP2"
+    finally:
+        _stop_bus(p)
+
+
+def test_socket_is_owner_only_and_needs_authkey(paths):
+    address, csv_path = paths
+    p = _start_bus(address, csv_path)
+    try:
+        bus.connect(address, KEY, retries=20, wait_sec=0.1)
+        assert stat.S_IMODE(os.stat(address).st_mode) == 0o600
+        with pytest.raises(multiprocessing.AuthenticationError):
+            bus.connect(address, "otra-clave")
+    finally:
+        _stop_bus(p)
+
+
+def test_shard_of_stable_and_in_range():
+    symbols = ["AAPL", "HTZ", "COMP", "BITF", "UWMC", "SOUN", "X"]
+    for n in (1, 2, 3, 8):
+        shards = [bus.shard_of(s, n) for s in symbols]
+        assert all(0 <= s < n for s in shards)
+        assert shards == [zlib.crc32(s.encode()) % n for s in symbols]
+    assert bus.shard_of("AAPL", 0) == 0
+
+
+def test_shard_of_same_in_other_process():
+    out = ctx.Queue()
+    p = ctx.Process(target=lambda: out.put([bus.shard_of(s, 4) for s in ("AAPL", "HTZ", "COMP")]))
+    p.start()
+    assert out.get(timeout=10) == [bus.shard_of(s, 4) for s in ("AAPL", "HTZ", "COMP")]
+    p.join(10)
+
+
+def _cycle(ts, quotes=(), new=()):
+    return {"ts": ts.isoformat(timespec="seconds"), "quotes": list(quotes), "new": list(new)}
+
+
+def test_merge_cycles_keeps_all_new_and_latest_quotes():
+    now = datetime(2025, 11, 4, 10, 0, 0)
+    old = _cycle(now - timedelta(seconds=240), [{"Symbol": "AAA", "price": 1.0}], [{"Symbol": "AAA", "price": 1.0}])
+    mid = _cycle(now - timedelta(seconds=120), [{"Symbol": "AAA", "price": 1.5}], [{"Symbol": "AAA", "price": 1.5}, {"Symbol": "BBB", "price": 2.0}])
+    last = _cycle(now - timedelta(seconds=10), [{"Symbol": "CCC", "price": 3.0}])
+
+    merged = bus.merge_cycles([old, mid, last], max_age_sec=120, now=now)
+    assert merged["ts"] == last["ts"]
+    assert merged["quotes"] == last["quotes"]
+    assert merged["new"] == [{"Symbol": "AAA", "price": 1.0}, {"Symbol": "BBB", "price": 2.0}]
+
+
+def test_merge_cycles_drops_stale_quotes_but_not_new():
+    now = datetime(2025, 11, 4, 10, 0, 0)
+    stale = _cycle(now - timedelta(seconds=600), [{"Symbol": "AAA", "price": 1.0}], [{"Symbol": "AAA", "price": 1.0}])
+
+    merged = bus.merge_cycles([stale], max_age_sec=120, now=now)
+    assert merged["quotes"] == []
+    assert merged["new"] == [{"Symbol": "AAA", "price": 1.0}]
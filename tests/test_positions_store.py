@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+import positions_store
+from positions_store import PositionTable, load_positions, update_position, close_position, get_position
+from trade_evaluator import register_new_signal
+
+SETTINGS = {"risk": {"capital_per_trade_usd": 100, "stop_loss_pct": 8, "tp1_pct": 10, "tp2_pct": 20}}
+FIELDS = {
+    "status": str, "entry_price": float, "avg_price": float, "qty_usd": float,
+    "adds_done": int, "stop": float, "tp1": float, "tp2": float, "partial_taken": bool,
+}
+
+
+def _snapshot():
+    """load_positions() normalizado (sin timestamps) para comparar backends."""
+    df = load_positions()
+    return {r["symbol"]: {k: cast(r[k]) for k, cast in FIELDS.items()} for _, r in df.iterrows()}
+
+
+def _run_sequence():
+    """register -> update -> close -> load_positions."""
+    register_new_signal("AAA", 5.0, SETTINGS)
+    register_new_signal("BBB", 2.0, SETTINGS)
+    register_new_signal("AAA", 9.0, SETTINGS)  # ya abierta: no se re-registra
+    update_position("AAA", {"avg_price": 4.8, "adds_done": 1, "last_eval": "ignorado"})
+    update_position("ZZZ", {"stop": 1.0})      # símbolo inexistente: no hace nada
+    close_position("BBB", "STOP")
+    return _snapshot()
+
+
+@pytest.fixture
+def csv_mode(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # POS_CSV_DEFAULT es relativo
+    monkeypatch.setattr(positions_store, "_backend", None)
+
+
+@pytest.fixture
+def table_mode(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    table = PositionTable(csv_path=str(tmp_path / "bus" / "positions.csv"))
+    monkeypatch.setattr(positions_store, "_backend", table)
+    return table
+
+
+def test_csv_sequence(csv_mode):
+    res = _run_sequence()
+    assert set(res) == {"AAA", "BBB"}
+    assert res["AAA"]["status"] == "OPEN"
+    assert res["AAA"]["entry_price"] == 5.0
+    assert res["AAA"]["avg_price"] == 4.8
+    assert res["AAA"]["adds_done"] == 1
+    assert res["BBB"]["status"] == "CLOSED:STOP"
+
+
+def test_table_matches_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(positions_store, "_backend", None)
+    expected = _run_sequence()
+
+    table = PositionTable(csv_path=str(tmp_path / "bus" / "positions.csv"))
+    monkeypatch.setattr(positions_store, "_backend", table)
+    assert _run_sequence() == expected
+
+
+def test_table_get_returns_copy(table_mode):
+    register_new_signal("AAA", 5.0, SETTINGS)
+    pos = get_position("AAA")
+    pos["status"] = "CLOSED:X"
+    assert get_position("AAA")["status"] == "OPEN"
+    assert get_position("NOPE") is None
+
+
+def test_table_write_through_survives_reload(table_mode):
+    expected = _run_sequence()
+    positions_store.use_backend(PositionTable.from_csv(table_mode.csv_path))
+    assert _snapshot() == expected
+
+
+def test_save_is_atomic(table_mode):
+    register_new_signal("AAA", 5.0, SETTINGS)
+    assert os.path.exists(table_mode.csv_path)
+    assert not [f for f in os.listdir(os.path.dirname(table_mode.csv_path)) if f.endswith(".tmp")]
+
+
+@pytest.mark.parametrize("content", ["", "\x00\x01garbage\n\"unterminated"])
+def test_from_csv_survives_damaged_file(tmp_path, content):
+    path = tmp_path / "positions.csv"
+    path.write_text(content)
+
+    table = PositionTable.from_csv(str(path))
+    assert table.rows() == []
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith("positions.csv.corrupt-")]
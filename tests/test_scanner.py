@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import scanner
+
+
+@pytest.fixture
+def log_csv(tmp_path, monkeypatch):
+    path = str(tmp_path / "signals.csv")
+    monkeypatch.setattr(scanner, "LOG_CSV", path)
+    monkeypatch.setattr(scanner, "MIN_CHANGE", 2.0)
+    monkeypatch.setattr(scanner, "COOLDOWN_MIN", 15)
+    monkeypatch.setattr(scanner, "settings", {"capital": {"per_stock_usd": 100}})
+    return path
+
+
+def _row(sym="AAA", price=4.0, pct=10.0, volume=2_000_000):
+    return {"Symbol": sym, "price": price, "pct": pct, "volume": volume}
+
+
+def _ago(minutes):
+    return (datetime.now() - timedelta(minutes=minutes)).isoformat(timespec="seconds")
+
+
+def test_new_symbol_alerts_logs_and_remembers(log_csv):
+    last_alert = {}
+    msg, reason = scanner.process_candidate(_row(), "2025-11-04T10:00:00", "2025-11-04", [], last_alert)
+
+    assert reason == "new"
+    assert "💎 AAA" in msg and "+10.00%" in msg and "Acciones sugeridas: 25 (~$100.0)" in msg
+    assert last_alert["AAA"] == {"last_pct": 10.0, "last_price": 4.0, "last_ts": "2025-11-04T10:00:00"}
+    logged = pd.read_csv(log_csv)
+    assert logged[["symbol", "price", "pct_change", "volume"]].values.tolist() == [["AAA", 4.0, 10.0, 2_000_000]]
+
+
+def test_open_position_only_logs(log_csv):
+    last_alert = {}
+    msg, reason = scanner.process_candidate(_row(), "2025-11-04T10:00:00", "2025-11-04", ["AAA"], last_alert)
+
+    assert (msg, reason) == (None, "open")
+    assert last_alert == {}
+    assert len(pd.read_csv(log_csv)) == 1
+
+
+def test_recent_alert_without_jump_is_silent(log_csv):
+    last_alert = {"AAA": {"last_pct": 9.0, "last_price": 4.0, "last_ts": _ago(5)}}
+    msg, _ = scanner.process_candidate(_row(pct=10.0), "ts", "d", [], last_alert)
+
+    assert msg is None
+    assert last_alert["AAA"]["last_pct"] == 9.0
+    assert len(pd.read_csv(log_csv)) == 1  # se loguea igual
+
+
+def test_pct_jump_realerts(log_csv):
+    last_alert = {"AAA": {"last_pct": 7.0, "last_price": 4.0, "last_ts": _ago(5)}}
+    msg, reason = scanner.process_candidate(_row(pct=10.0), "ts2", "d", [], last_alert)
+
+    assert msg is not None
+    assert reason == "+3.0% / 5m"
+    assert last_alert["AAA"]["last_ts"] == "ts2"
+
+
+def test_cooldown_realerts(log_csv):
+    last_alert = {"AAA": {"last_pct": 10.0, "last_price": 4.0, "last_ts": _ago(20)}}
+    msg, reason = scanner.process_candidate(_row(pct=10.0), "ts2", "d", [], last_alert)
+
+    assert msg is not None
+    assert reason == "+0.0% / 20m"